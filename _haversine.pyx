@@ -0,0 +1,147 @@
+# cython: language_level=3
+"""
+Cython haversine and equirectangular kernels for the distance matrix.
+All elementwise steps of each formula are fused into one loop, so no
+temporary n x n arrays are created, and rows are split across OpenMP threads.
+The trigonometry uses the same polynomial approximations as the Numba kernel in
+tsp_solver_numba.py (relative error around 1e-11). They are branch-free and call
+no libm function other than sqrt, so with the compiler flags set in build_aot.py
+the inner loop is vectorized.
+Build it with python build_aot.py.
+"""
+
+cimport cython
+from cython.parallel cimport prange
+from libc.math cimport copysign, cos, fabs, sin, sqrt, M_PI, M_PI_2
+
+import numpy as np
+
+
+cdef inline double fast_sin(double x) noexcept nogil:
+    """sin(x) for |x| <= pi from its Taylor series up to x**15."""
+    cdef double t = fabs(x)
+    cdef double z
+    
+    # Fold onto [0, pi/2] using sin(t) = sin(pi - t), then restore the sign;
+    # the conditional expression compiles to a min instruction, not a branch
+    t = t if t < M_PI - t else M_PI - t
+    z = t * t
+    return copysign(t * (1.0 + z * (-1.6666666666666666e-01 + z * (8.3333333333333333e-03
+        + z * (-1.9841269841269841e-04 + z * (2.7557319223985893e-06
+        + z * (-2.5052108385441720e-08 + z * (1.6059043836821613e-10
+        + z * -7.6471637318198164e-13))))))), x)
+
+
+cdef inline double fast_cos(double x) noexcept nogil:
+    """cos(x) for |x| <= pi, using cos(x) = sin(pi/2 - |x|)."""
+    return fast_sin(M_PI_2 - fabs(x))
+
+
+# q has no zero on [0, 0.5]; without Cython's zero-division check the loop
+# calling this stays free of control flow
+@cython.cdivision(True)
+cdef inline double fast_asin(double x) noexcept nogil:
+    """asin(x) for 0 <= x <= 1 from the Cephes rational approximation."""
+    cdef double z, p, q, r
+    cdef bint big = x > 0.5
+    
+    # The rational form holds up to 0.625; above 0.5 use
+    # asin(x) = pi/2 - 2 * asin(sqrt((1 - x) / 2)) instead of calling libm
+    x = sqrt(0.5 * (1.0 - x)) if big else x
+    z = x * x
+    p = (((((4.253011369004428248960e-03 * z - 6.019598008014123785661e-01) * z
+        + 5.444622390564711410273e+00) * z - 1.626247967210700244449e+01) * z
+        + 1.956261983317594739197e+01) * z - 8.198089802484824371615e+00)
+    q = (((((z - 1.474091372988853791896e+01) * z + 7.049610280856842141659e+01) * z
+        - 1.471791292232726029859e+02) * z + 1.395105614657485689735e+02) * z
+        - 4.918853881490881290097e+01)
+    r = x + x * z * p / q
+    return M_PI_2 - 2.0 * r if big else r
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def haversine_matrix(double[::1] lat, double[::1] lon, double radius):
+    """
+    Calculate the pairwise haversine distance matrix.
+    
+    Args:
+        lat (numpy.ndarray): Contiguous float64 latitudes in radians
+        lon (numpy.ndarray): Contiguous float64 longitudes in radians, within [-pi, pi]
+        radius (float): Sphere radius; distances use the same unit
+        
+    Returns:
+        numpy.ndarray: 2D float32 distance matrix
+    """
+    cdef Py_ssize_t n = lat.shape[0]
+    cdef Py_ssize_t i, j
+    cdef double a, s_dlat, s_dlon
+    
+    out = np.empty((n, n), dtype=np.float32)
+    cdef float[:, ::1] o = out
+    
+    # Per-place terms, computed once instead of once per pair
+    cdef double[::1] clat = np.empty(n, dtype=np.float64)
+    cdef double[::1] half_lat = np.empty(n, dtype=np.float64)
+    cdef double[::1] half_lon = np.empty(n, dtype=np.float64)
+    for i in range(n):
+        clat[i] = fast_cos(lat[i])
+        half_lat[i] = 0.5 * lat[i]
+        half_lon[i] = 0.5 * lon[i]
+        
+    # Each thread fills whole rows, so no two threads write the same cache line
+    for i in prange(n, nogil=True, schedule='static'):
+        for j in range(n):
+            s_dlat = fast_sin(half_lat[j] - half_lat[i])
+            s_dlon = fast_sin(half_lon[j] - half_lon[i])
+            a = s_dlat * s_dlat + clat[i] * clat[j] * s_dlon * s_dlon
+            a = a if a < 1.0 else 1.0
+            o[i, j] = <float>(2 * radius * fast_asin(sqrt(a)))
+            
+    return out
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def equirectangular_matrix(double[::1] lat, double[::1] lon, double radius):
+    """
+    Calculate the pairwise equirectangular distance matrix.
+    Each pair is treated as lying on a flat plane at their mean latitude.
+    
+    Args:
+        lat (numpy.ndarray): Contiguous float64 latitudes in radians
+        lon (numpy.ndarray): Contiguous float64 longitudes in radians, within [-pi, pi]
+        radius (float): Sphere radius; distances use the same unit
+        
+    Returns:
+        numpy.ndarray: 2D float32 distance matrix
+    """
+    cdef Py_ssize_t n = lat.shape[0]
+    cdef Py_ssize_t i, j
+    cdef double half_dlat, half_dlon, x
+    
+    out = np.empty((n, n), dtype=np.float32)
+    cdef float[:, ::1] o = out
+    
+    # Per-place terms; the cosine of the mean latitude of a pair then follows
+    # from cos(a + b) = cos(a) cos(b) - sin(a) sin(b) without a per-pair cos
+    cdef double[::1] chalf = np.empty(n, dtype=np.float64)
+    cdef double[::1] shalf = np.empty(n, dtype=np.float64)
+    cdef double[::1] half_lat = np.empty(n, dtype=np.float64)
+    cdef double[::1] half_lon = np.empty(n, dtype=np.float64)
+    for i in range(n):
+        half_lat[i] = 0.5 * lat[i]
+        half_lon[i] = 0.5 * lon[i]
+        chalf[i] = cos(half_lat[i])
+        shalf[i] = sin(half_lat[i])
+        
+    for i in prange(n, nogil=True, schedule='static'):
+        for j in range(n):
+            half_dlat = half_lat[j] - half_lat[i]
+            # Take the short way round across the antimeridian
+            half_dlon = fabs(half_lon[j] - half_lon[i])
+            half_dlon = half_dlon if half_dlon < M_PI - half_dlon else M_PI - half_dlon
+            x = (chalf[i] * chalf[j] - shalf[i] * shalf[j]) * half_dlon
+            o[i, j] = <float>(2 * radius * sqrt(half_dlat * half_dlat + x * x))
+            
+    return out
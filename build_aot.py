@@ -0,0 +1,116 @@
+"""
+Ahead-of-time build script for the compiled TSP kernels.
+Compiles the kernels from tsp_solver_numba.py into a native extension module
+named tsp_numba, which tsp_solver.py imports in preference to the JIT versions
+so that no compilation happens at run time. When Cython is installed it also
+builds the _haversine extension used by distance.py.
+
+An extension is only imported while it is newer than its source file (see
+extensions.py), so after editing tsp_solver_numba.py or _haversine.pyx rerun
+this script, or the JIT and NumPy versions are used until you do.
+
+numba.pycc has been pending deprecation since Numba 0.57 and, as of Numba 0.68,
+importing it emits a NumbaPendingDeprecationWarning; the build still works.
+
+Usage:
+    python build_aot.py [--native]
+
+--native compiles _haversine for the CPU of the building machine (GCC and
+Clang -march=native). That roughly triples its speed, but the module then
+crashes with an illegal instruction on older CPUs, so only use it when the
+build is not shared with other machines.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Add the current directory to the path if not already there
+sys.path.insert(0, HERE)
+
+from extensions import EXTENSION_SOURCES
+
+
+def build_numba(output_dir=None):
+    """
+    Compile the greedy and 2-opt kernels into the tsp_numba extension module.
+    
+    Args:
+        output_dir (str): Directory for the compiled module (defaults to this directory)
+    """
+    from numba.pycc import CC
+    from tsp_solver_numba import greedy_solver_nb, two_opt_nb
+    
+    cc = CC('tsp_numba')
+    cc.output_dir = output_dir or HERE
+    
+    # pycc compiles one signature per export, so each matrix dtype gets its own
+    for dtype in ('f4', 'f8'):
+        cc.export(f'greedy_solver_{dtype}', f'i8[:]({dtype}[:,:], i8)')(greedy_solver_nb.py_func)
+        cc.export(f'two_opt_{dtype}', f'i8[:](i8[:], {dtype}[:,:])')(two_opt_nb.py_func)
+    
+    cc.compile()
+
+
+def build_haversine(output_dir=None, native=False):
+    """
+    Compile _haversine.pyx into the _haversine extension module with Cython.
+    
+    Args:
+        output_dir (str): Directory for the compiled module (defaults to this directory)
+        native (bool): Use every instruction set of this machine's CPU (not portable)
+    """
+    from Cython.Build import cythonize
+    from setuptools import Extension, setup
+    
+    # OpenMP backs the prange loop; MSVC spells the flag differently
+    openmp = ['/openmp'] if sys.platform == 'win32' else ['-fopenmp']
+    
+    # GCC and Clang only vectorize the inner loop when sqrt need not set errno
+    # and the selects may be evaluated speculatively
+    vectorize = [] if sys.platform == 'win32' else ['-fno-math-errno', '-fno-trapping-math']
+    if native and sys.platform != 'win32':
+        vectorize.append('-march=native')
+    
+    extension = Extension(
+        '_haversine', [EXTENSION_SOURCES['_haversine']],
+        extra_compile_args=openmp + vectorize,
+        extra_link_args=[] if sys.platform == 'win32' else openmp,
+    )
+    
+    with tempfile.TemporaryDirectory() as build_temp:
+        setup(
+            name='_haversine',
+            ext_modules=cythonize([extension], quiet=True),
+            script_args=['build_ext', '--build-lib', output_dir or HERE,
+                         '--build-temp', build_temp],
+        )
+
+
+def main():
+    """
+    Build every extension whose compiler toolchain is installed.
+    """
+    parser = argparse.ArgumentParser(description='Build the compiled TSP kernels')
+    parser.add_argument('--native', action='store_true',
+                        help='Compile _haversine for this machine\'s CPU only (faster, not portable)')
+    args = parser.parse_args()
+    
+    try:
+        build_numba()
+        print("Built tsp_numba")
+    except ImportError:
+        print("Note: numba not available, skipping tsp_numba")
+        
+    try:
+        build_haversine(native=args.native)
+        print("Built _haversine")
+    except ImportError:
+        print("Note: Cython not available, skipping _haversine")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Regression check for the 2-opt route optimizer.
+Runs optimize_route on random tours, both open and returning to the start,
+through the NumPy code path and the compiled kernels, and checks that each
+result keeps the same places, keeps its first and last place fixed, leaves no
+improving 2-opt move, and that all code paths return the same route.
+
+Usage:
+    python check_two_opt.py [--tours 200] [--seed 0]
+"""
+
+import argparse
+import os
+import random
+import sys
+
+import numpy as np
+
+# Add the current directory to the path if not already there
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import tsp_solver
+from tsp_solver import optimize_route
+from tsp_solver_numba import NUMBA_AVAILABLE, two_opt_nb
+
+
+def random_tour(rng, n, return_to_start, dtype):
+    """
+    Build a random route over random points in the plane.
+    
+    Args:
+        rng (random.Random): Random number generator
+        n (int): Number of places
+        return_to_start (bool): Whether the route ends back at its first place
+        dtype (numpy.dtype): Distance matrix dtype
+        
+    Returns:
+        tuple: (route as a list of indices, 2D distance matrix)
+    """
+    xy = np.array([(rng.uniform(0, 100), rng.uniform(0, 100)) for _ in range(n)])
+    dist_matrix = np.hypot(*(xy[:, None, :] - xy[None, :, :]).transpose(2, 0, 1)).astype(dtype)
+    
+    route = list(range(n))
+    rng.shuffle(route)
+    if return_to_start:
+        route.append(route[0])
+    return route, dist_matrix
+
+
+def improving_move(route, dist_matrix):
+    """
+    Find a 2-opt move that still shortens the route, if any is left.
+    Uses the same moves and tolerance as optimize_route: edge i, joining
+    route[i-1] and route[i], against every edge k with |k - i| >= 2.
+    
+    Args:
+        route (list): Route as a list of indices
+        dist_matrix (numpy.ndarray): 2D distance matrix
+        
+    Returns:
+        tuple: (i, k, delta) of an improving move, or None
+    """
+    d = dist_matrix.astype(np.float64)
+    for i in range(1, len(route)):
+        x, y = route[i-1], route[i]
+        for k in range(1, len(route)):
+            if abs(k - i) < 2:
+                continue
+            u, v = route[k-1], route[k]
+            delta = (d[x, u] - d[x, y]) + (d[y, v] - d[u, v])
+            if delta < -1e-12:
+                return i, k, delta
+    return None
+
+
+def numpy_optimize_route(route, dist_matrix):
+    """Run optimize_route through its NumPy code path."""
+    compiled = tsp_solver.COMPILED_KERNELS
+    tsp_solver.COMPILED_KERNELS = False
+    try:
+        return optimize_route(route, dist_matrix)
+    finally:
+        tsp_solver.COMPILED_KERNELS = compiled
+
+
+def check_tour(route, dist_matrix):
+    """
+    Optimize one route through every available code path and check the results.
+    
+    Args:
+        route (list): Initial route as a list of indices
+        dist_matrix (numpy.ndarray): 2D distance matrix
+        
+    Returns:
+        list: Descriptions of the failed checks (empty if all passed)
+    """
+    failures = []
+    results = {'numpy': numpy_optimize_route(route, dist_matrix)}
+    if NUMBA_AVAILABLE:
+        results['numba jit'] = two_opt_nb(np.array(route, dtype=np.int64), dist_matrix).tolist()
+    if tsp_solver.COMPILED_KERNELS:
+        results['default'] = optimize_route(route, dist_matrix)
+        
+    for name, result in results.items():
+        if sorted(result) != sorted(route):
+            failures.append(f"{name}: places changed")
+        if result[0] != route[0] or result[-1] != route[-1]:
+            failures.append(f"{name}: endpoints moved")
+        move = improving_move(result, dist_matrix)
+        if move is not None:
+            failures.append(f"{name}: improving move left at i={move[0]}, k={move[1]} "
+                            f"(delta {move[2]:.3g})")
+            
+    if any(result != results['numpy'] for result in results.values()):
+        failures.append("code paths returned different routes: " + ", ".join(results))
+        
+    return failures
+
+
+def main():
+    """
+    Check optimize_route on random tours and exit with status 1 on any failure.
+    """
+    parser = argparse.ArgumentParser(description='Regression check for the 2-opt optimizer')
+    parser.add_argument('--tours', type=int, default=200, help='Number of random tours')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    args = parser.parse_args()
+    
+    rng = random.Random(args.seed)
+    failed = 0
+    
+    for t in range(args.tours):
+        n = rng.randint(4, 60)
+        return_to_start = t % 2 == 0
+        dtype = np.float32 if t % 4 < 2 else np.float64
+        route, dist_matrix = random_tour(rng, n, return_to_start, dtype)
+        
+        failures = check_tour(route, dist_matrix)
+        if failures:
+            failed += 1
+            print(f"Tour {t} (n={n}, return={return_to_start}, {np.dtype(dtype).name}):")
+            for failure in failures:
+                print(f"  {failure}")
+                
+    if not NUMBA_AVAILABLE:
+        print("Note: numba not available, only the NumPy code path was checked")
+    print(f"{args.tours - failed}/{args.tours} tours passed")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
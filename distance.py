@@ -1,4 +1,48 @@
-# Check the distance calculation implementation in distance.py
+"""
+Distance module for the TSP solver.
+Computes great circle distances between places and the pairwise distance matrix.
+"""
+
+from math import radians, sin, cos, sqrt, atan2
+
+import numpy as np
+
+from extensions import extension_is_current
+from places import Places
+
+try:
+    # Compiled single-pass kernels, built with build_aot.py when Cython is installed.
+    # They load instantly, so they are worth using for every matrix size
+    if not extension_is_current('_haversine'):
+        raise ImportError("_haversine is missing or older than _haversine.pyx")
+    from _haversine import haversine_matrix, equirectangular_matrix
+    _cython_kernels = {
+        'haversine': haversine_matrix,
+        'equirectangular': equirectangular_matrix,
+    }
+except ImportError:
+    _cython_kernels = {}
+
+# The Numba kernels, loaded by _matrix_kernel on first use
+_numba_kernels = None
+
+# Radius of earth in kilometers
+EARTH_RADIUS_KM = 6371.0
+
+# Storage type of the distance matrix; float32 keeps about a metre of precision
+# on Earth at half the memory of float64
+DISTANCE_DTYPE = np.float32
+
+# Side of the square tiles the NumPy fallback works in; the handful of float64
+# temporaries per tile (128 * 128 * 8 bytes each) stay within L2 cache
+TILE_SIZE = 128
+
+# Importing Numba and loading its cached parallel kernels takes about half a
+# second, which it only wins back over the NumPy tiles, or a portable build of
+# _haversine, from about this many places
+NUMBA_MIN_PLACES = 4000
+
+
 def haversine_distance(lat1, lon1, lat2, lon2):
     """
     Calculate the great circle distance between two points 
@@ -6,8 +50,6 @@ def haversine_distance(lat1, lon1, lat2, lon2):
     
     Returns distance in kilometers
     """
-    from math import radians, sin, cos, sqrt, atan2
-    
     # Convert decimal degrees to radians
     lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
     
@@ -17,33 +59,149 @@ def haversine_distance(lat1, lon1, lat2, lon2):
     a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
     c = 2 * atan2(sqrt(a), sqrt(1-a)) 
     
-    # Radius of earth in kilometers
-    r = 6371
-    
     # Distance in km
-    return r * c
+    return EARTH_RADIUS_KM * c
+
 
-def calculate_distance_matrix(places):
+def calculate_distance_matrix(places, metric='haversine'):
     """
     Calculate distance matrix between all places.
     
+    A multi-threaded compiled kernel computes the matrix when one is
+    available: Numba's from NUMBA_MIN_PLACES places on, since it is compiled
+    for this CPU, and the _haversine extension's below that or without Numba.
+    Otherwise the distances are evaluated with NumPy broadcasting over
+    TILE_SIZE x TILE_SIZE tiles of the upper triangle, so the trigonometry runs
+    inside NumPy and the temporaries stay cache-sized.
+    
+    The equirectangular metric treats each pair as lying on a flat plane at
+    their mean latitude. It needs no trigonometry per pair and agrees with the
+    haversine distance to within 0.5% for tours spanning less than ~100 km.
+    
     Args:
-        places (list): List of Place namedtuples
+        places (Places or list): Places, or a list of Place namedtuples
+        metric (str): 'haversine' or 'equirectangular'
         
     Returns:
-        list: 2D distance matrix
-    """
-    n = len(places)
-    dist_matrix = [[0.0 for _ in range(n)] for _ in range(n)]
-    
-    for i in range(n):
-        for j in range(i+1, n):
-            dist = haversine_distance(
-                places[i].lat, places[i].lon,
-                places[j].lat, places[j].lon
-            )
-            # Store distance in both directions
-            dist_matrix[i][j] = dist
-            dist_matrix[j][i] = dist
+        numpy.ndarray: 2D float32 distance matrix in kilometers
+    """
+    if isinstance(places, Places):
+        # Coordinates are already stored as contiguous arrays
+        lat = np.radians(places.lat)
+        lon = np.radians(places.lon)
+    else:
+        n = len(places)
+        lat = np.radians(np.fromiter((p.lat for p in places), dtype=np.float64, count=n))
+        lon = np.radians(np.fromiter((p.lon for p in places), dtype=np.float64, count=n))
+    
+    if metric == 'haversine':
+        distance_tile = _haversine_tile
+    elif metric == 'equirectangular':
+        distance_tile = _equirectangular_tile
+    else:
+        raise ValueError(f"Unknown distance metric '{metric}'")
+    
+    matrix_kernel = _matrix_kernel(metric, len(lat))
+    if matrix_kernel is not None:
+        return matrix_kernel(lat, lon, EARTH_RADIUS_KM)
+    
+    # Per-place terms, computed once instead of once per pair
+    half_lat = 0.5 * lat
+    half_lon = 0.5 * lon
+    if distance_tile is _haversine_tile:
+        place_terms = (np.cos(lat),)
+    else:
+        place_terms = (np.cos(half_lat), np.sin(half_lat))
+    
+    n = len(lat)
+    dist_matrix = np.empty((n, n), dtype=DISTANCE_DTYPE)
+    
+    for i0 in range(0, n, TILE_SIZE):
+        rows = slice(i0, min(i0 + TILE_SIZE, n))
+        for j0 in range(i0, n, TILE_SIZE):
+            cols = slice(j0, min(j0 + TILE_SIZE, n))
+            
+            tile = distance_tile(rows, cols, half_lat, half_lon, *place_terms)
+            
+            # Store the tile and its mirror below the diagonal
+            dist_matrix[rows, cols] = tile
+            dist_matrix[cols, rows] = tile.T
             
     return dist_matrix
+
+
+def _matrix_kernel(metric, n):
+    """
+    Find the compiled kernel for a distance metric, importing Numba on first use.
+    
+    Args:
+        metric (str): 'haversine' or 'equirectangular'
+        n (int): Number of places in the matrix
+        
+    Returns:
+        function: Kernel taking (lat, lon, radius), or None to use the NumPy tiles
+    """
+    global _numba_kernels
+    
+    if n >= NUMBA_MIN_PLACES:
+        if _numba_kernels is None:
+            from tsp_solver_numba import NUMBA_AVAILABLE, haversine_matrix_nb, equirectangular_matrix_nb
+            _numba_kernels = {
+                'haversine': haversine_matrix_nb,
+                'equirectangular': equirectangular_matrix_nb,
+            } if NUMBA_AVAILABLE else {}
+        if metric in _numba_kernels:
+            return _numba_kernels[metric]
+            
+    return _cython_kernels.get(metric)
+
+
+def _haversine_tile(rows, cols, half_lat, half_lon, clat):
+    """
+    Haversine distances for one tile of the distance matrix.
+    
+    Args:
+        rows (slice): Places along the rows of the tile
+        cols (slice): Places along the columns of the tile
+        half_lat (numpy.ndarray): Half latitudes of all places in radians
+        half_lon (numpy.ndarray): Half longitudes of all places in radians
+        clat (numpy.ndarray): Cosine of the latitudes of all places
+        
+    Returns:
+        numpy.ndarray: Distances in kilometers for the tile
+    """
+    # Pairwise half-angle differences: row i, column j holds (place j - place i) / 2
+    half_dlat = half_lat[None, cols] - half_lat[rows, None]
+    half_dlon = half_lon[None, cols] - half_lon[rows, None]
+    
+    # Haversine formula; arcsin(sqrt(a)) equals atan2(sqrt(a), sqrt(1-a)) for a in [0, 1]
+    a = np.sin(half_dlat)**2 + clat[rows, None] * clat[None, cols] * np.sin(half_dlon)**2
+    return (2 * EARTH_RADIUS_KM) * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def _equirectangular_tile(rows, cols, half_lat, half_lon, chalf, shalf):
+    """
+    Equirectangular approximation of the distances for one tile of the distance matrix.
+    
+    Args:
+        rows (slice): Places along the rows of the tile
+        cols (slice): Places along the columns of the tile
+        half_lat (numpy.ndarray): Half latitudes of all places in radians
+        half_lon (numpy.ndarray): Half longitudes of all places in radians
+        chalf (numpy.ndarray): Cosine of the half latitudes of all places
+        shalf (numpy.ndarray): Sine of the half latitudes of all places
+        
+    Returns:
+        numpy.ndarray: Distances in kilometers for the tile
+    """
+    half_dlat = half_lat[None, cols] - half_lat[rows, None]
+    
+    # Take the short way round across the antimeridian
+    half_dlon = np.abs(half_lon[None, cols] - half_lon[rows, None])
+    half_dlon = np.minimum(half_dlon, np.pi - half_dlon)
+    
+    # Scale longitude by the cosine of the mean latitude (half_lat_i + half_lat_j),
+    # expanded as cos(a + b) = cos(a) cos(b) - sin(a) sin(b)
+    clat_mid = chalf[rows, None] * chalf[None, cols] - shalf[rows, None] * shalf[None, cols]
+    x = clat_mid * half_dlon
+    return (2 * EARTH_RADIUS_KM) * np.sqrt(half_dlat * half_dlat + x * x)
@@ -0,0 +1,33 @@
+"""
+Compiled extension lookup for the TSP solver.
+build_aot.py builds native versions of some modules; a build is only used
+while it is newer than the source file it was built from, so stale builds
+never run silently after the source has been edited.
+"""
+
+import importlib.util
+import os
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Source file each compiled extension is built from
+EXTENSION_SOURCES = {
+    'tsp_numba': os.path.join(HERE, 'tsp_solver_numba.py'),
+    '_haversine': os.path.join(HERE, '_haversine.pyx'),
+}
+
+
+def extension_is_current(name):
+    """
+    Check whether a compiled extension is built and newer than its source file.
+    
+    Args:
+        name (str): Module name, a key of EXTENSION_SOURCES
+        
+    Returns:
+        bool: True if the extension can be imported in place of its source
+    """
+    spec = importlib.util.find_spec(name)
+    if spec is None or spec.origin is None:
+        return False
+    return os.path.getmtime(spec.origin) >= os.path.getmtime(EXTENSION_SOURCES[name])
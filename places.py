@@ -0,0 +1,72 @@
+"""
+Place containers for the TSP solver.
+Places keeps names and coordinates as parallel arrays so the distance and
+output code can work on whole coordinate arrays at once, while indexing still
+returns a Place namedtuple for code that expects one, and slicing returns Places.
+"""
+
+from collections import namedtuple
+from dataclasses import dataclass
+
+import numpy as np
+
+Place = namedtuple('Place', ['name', 'lat', 'lon'])
+
+
+# eq=False: the generated __eq__ would compare the arrays through tuple
+# equality, which is ambiguous for more than one place
+@dataclass(eq=False)
+class Places:
+    """
+    Collection of places stored as parallel arrays.
+    
+    Attributes:
+        names (list): Place names
+        lat (numpy.ndarray): float64 latitudes in decimal degrees
+        lon (numpy.ndarray): float64 longitudes in decimal degrees
+    """
+    names: list
+    lat: np.ndarray
+    lon: np.ndarray
+    
+    def __post_init__(self):
+        self.names = list(self.names)
+        self.lat = np.ascontiguousarray(self.lat, dtype=np.float64)
+        self.lon = np.ascontiguousarray(self.lon, dtype=np.float64)
+        
+    @classmethod
+    def from_records(cls, records):
+        """
+        Build Places from (name, lat, lon) records such as Place namedtuples.
+        
+        Args:
+            records (iterable): Sequence of (name, lat, lon) tuples
+            
+        Returns:
+            Places: The places as parallel arrays
+        """
+        records = list(records)
+        return cls(
+            names=[r[0] for r in records],
+            lat=[r[1] for r in records],
+            lon=[r[2] for r in records],
+        )
+        
+    def __len__(self):
+        return len(self.names)
+        
+    def __eq__(self, other):
+        if not isinstance(other, Places):
+            return NotImplemented
+        return (self.names == other.names
+                and np.array_equal(self.lat, other.lat)
+                and np.array_equal(self.lon, other.lon))
+        
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return Places(names=self.names[i], lat=self.lat[i], lon=self.lon[i])
+        return Place(name=self.names[i], lat=float(self.lat[i]), lon=float(self.lon[i]))
+        
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
@@ -3,7 +3,7 @@ Travelling Salesman Problem (TSP) City-Tour Optimizer
 Main program file that handles command-line arguments and executes the overall flow.
 
 Usage:
-    python tsp.py --csv <csv_file> --start "<starting_point>" [--return] [--algo simulated-annealing]
+    python tsp.py --csv <csv_file> --start "<starting_point>" [--return] [--algo {auto,greedy,simulated-annealing,or-tools}] [--fast-metric]
 
 Example:
     python tsp.py --csv places.csv --start "Eiffel Tower" --return
@@ -13,7 +13,8 @@ import argparse
 import json
 import os
 import sys
-from collections import namedtuple
+
+import numpy as np
 
 # Import modules from the same directory
 import sys
@@ -23,7 +24,9 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from distance import calculate_distance_matrix
-from tsp_solver import greedy_solver, optimize_route
+from places import Place, Places
+from tsp_solver import greedy_solver, optimize_route, calculate_route_distance
+from tsp_solver import ortools_solver, ORTOOLS_AVAILABLE, ORTOOLS_MIN_PLACES
 
 
 def parse_arguments():
@@ -38,8 +41,14 @@ def parse_arguments():
     parser.add_argument('--start', required=True, help='Name of the starting point')
     parser.add_argument('--return', dest='return_to_start', action='store_true', 
                         help='Return to the starting point')
-    parser.add_argument('--algo', choices=['greedy', 'simulated-annealing'], 
-                        default='greedy', help='Algorithm to use')
+    parser.add_argument('--algo', choices=['auto', 'greedy', 'simulated-annealing', 'or-tools'], 
+                        default='auto',
+                        help='Algorithm to use (auto picks or-tools above '
+                             f'{ORTOOLS_MIN_PLACES} places when ortools is installed, '
+                             'otherwise greedy)')
+    parser.add_argument('--fast-metric', action='store_true',
+                        help='Use the equirectangular distance approximation '
+                             '(accurate for tours spanning under ~100 km)')
     return parser.parse_args()
 
 
@@ -51,10 +60,9 @@ def read_csv(filename):
         filename (str): Path to the CSV file
         
     Returns:
-        list: List of Place namedtuples (name, lat, lon)
+        Places: Names and coordinates of the places as parallel arrays
     """
     places = []
-    Place = namedtuple('Place', ['name', 'lat', 'lon'])
     
     try:
         with open(filename, 'r') as f:
@@ -87,7 +95,7 @@ def read_csv(filename):
         print("Error: No valid places found in the CSV file")
         sys.exit(1)
         
-    return places
+    return Places.from_records(places)
 
 
 def find_starting_index(places, start_name):
@@ -95,7 +103,7 @@ def find_starting_index(places, start_name):
     Find the index of the starting place.
     
     Args:
-        places (list): List of Place namedtuples
+        places (Places): Places read from the CSV file
         start_name (str): Name of the starting place
         
     Returns:
@@ -120,15 +128,12 @@ def calculate_total_distance(route, dist_matrix):
     
     Args:
         route (list): List of indices representing the route
-        dist_matrix (list): 2D distance matrix
+        dist_matrix (numpy.ndarray): 2D distance matrix
         
     Returns:
         float: Total distance in kilometers
     """
-    total = 0
-    for i in range(len(route) - 1):
-        total += dist_matrix[route[i]][route[i+1]]
-    return total
+    return calculate_route_distance(route, dist_matrix)
 
 
 def create_geojson(places, route, output_file="route.geojson"):
@@ -136,12 +141,12 @@ def create_geojson(places, route, output_file="route.geojson"):
     Create a GeoJSON file for the route that can be imported into mapping software.
     
     Args:
-        places (list): List of Place namedtuples
+        places (Places): Places read from the CSV file
         route (list): List of indices representing the route
         output_file (str): Output file name
     """
     # Create a LineString feature for the route
-    coordinates = [[places[i].lon, places[i].lat] for i in route]
+    coordinates = np.column_stack([places.lon[route], places.lat[route]]).tolist()
     
     geojson = {
         "type": "FeatureCollection",
@@ -195,21 +200,34 @@ def main():
         sys.exit(1)
     
     # Calculate distance matrix
-    dist_matrix = calculate_distance_matrix(places)
-    
-    # Solve TSP using greedy algorithm
-    route = greedy_solver(dist_matrix, start_idx)
+    metric = 'equirectangular' if args.fast_metric else 'haversine'
+    dist_matrix = calculate_distance_matrix(places, metric=metric)
     
-    # If return flag is set, add the starting point to the end
-    if args.return_to_start:
-        route.append(start_idx)
+    use_ortools = args.algo == 'or-tools' or (
+        args.algo == 'auto' and ORTOOLS_AVAILABLE and len(places) > ORTOOLS_MIN_PLACES)
     
-    # Optimize the route using 2-opt
-    if len(route) > 3:  # Only optimize if there are enough points
-        print("Optimizing route using 2-opt algorithm...")
-        optimized_route = optimize_route(route, dist_matrix)
+    if use_ortools:
+        if not ORTOOLS_AVAILABLE:
+            print("Error: --algo or-tools requires ortools (pip install ortools)")
+            sys.exit(1)
+            
+        # Solve TSP using OR-tools guided local search
+        print("Optimizing route using OR-tools guided local search...")
+        optimized_route = ortools_solver(dist_matrix, start_idx, args.return_to_start)
     else:
-        optimized_route = route
+        # Solve TSP using greedy algorithm
+        route = greedy_solver(dist_matrix, start_idx)
+        
+        # If return flag is set, add the starting point to the end
+        if args.return_to_start:
+            route.append(start_idx)
+        
+        # Optimize the route using 2-opt
+        if len(route) > 3:  # Only optimize if there are enough points
+            print("Optimizing route using 2-opt algorithm...")
+            optimized_route = optimize_route(route, dist_matrix)
+        else:
+            optimized_route = route
     
     # Calculate total distance
     total_distance = calculate_total_distance(optimized_route, dist_matrix)
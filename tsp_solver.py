@@ -1,11 +1,70 @@
 """
 TSP solver module implementing various algorithms for solving the Travelling Salesman Problem.
-Includes greedy nearest neighbor algorithm and 2-opt improvement algorithm.
+Includes greedy nearest neighbor algorithm and 2-opt improvement algorithm,
+and a wrapper around the Google OR-tools routing solver when it is installed.
 """
 
 import random
 import math
 
+import numpy as np
+
+from extensions import extension_is_current
+
+# Prefer the prebuilt kernels from build_aot.py, which need no JIT warm-up, but
+# only while they are newer than tsp_solver_numba.py. COMPILED_KERNELS tells
+# whether greedy_solver_nb and two_opt_nb run as machine code; both take a
+# float32 or float64 distance matrix
+try:
+    if not extension_is_current('tsp_numba'):
+        raise ImportError("tsp_numba is missing or older than tsp_solver_numba.py")
+    import tsp_numba
+    COMPILED_KERNELS = True
+    
+    def greedy_solver_nb(dist_matrix, start_idx):
+        if dist_matrix.dtype == np.float32:
+            return tsp_numba.greedy_solver_f4(dist_matrix, start_idx)
+        return tsp_numba.greedy_solver_f8(dist_matrix, start_idx)
+        
+    def two_opt_nb(route, dist_matrix):
+        if dist_matrix.dtype == np.float32:
+            return tsp_numba.two_opt_f4(route, dist_matrix)
+        return tsp_numba.two_opt_f8(route, dist_matrix)
+
+except ImportError:
+    from tsp_solver_numba import NUMBA_AVAILABLE as COMPILED_KERNELS, greedy_solver_nb, two_opt_nb
+
+try:
+    # Optional: pip install ortools
+    from ortools.constraint_solver import pywrapcp, routing_enums_pb2
+    ORTOOLS_AVAILABLE = True
+except ImportError:
+    ORTOOLS_AVAILABLE = False
+
+# Above this many places tsp.py's automatic choice hands the solve to OR-tools
+# when it is installed
+ORTOOLS_MIN_PLACES = 30
+
+# Guided local search only stops at its time limit, so ortools_solver gives it
+# this many milliseconds per place, up to the time limit
+ORTOOLS_MS_PER_PLACE = 10
+
+
+def _kernel_matrix(dist_matrix):
+    """
+    Prepare a distance matrix for the compiled kernels.
+    float32 and float64 matrices are passed on as they are, so routes match
+    the NumPy code path and no copy is made; other dtypes become float64.
+    
+    Args:
+        dist_matrix (numpy.ndarray): 2D distance matrix
+        
+    Returns:
+        numpy.ndarray: Contiguous float32 or float64 distance matrix
+    """
+    dtype = np.float32 if dist_matrix.dtype == np.float32 else np.float64
+    return np.ascontiguousarray(dist_matrix, dtype=dtype)
+
 
 def greedy_solver(dist_matrix, start_idx):
     """
@@ -13,78 +72,114 @@ def greedy_solver(dist_matrix, start_idx):
     Start at the given index and always visit the nearest unvisited place next.
     
     Args:
-        dist_matrix (list): 2D distance matrix
+        dist_matrix (numpy.ndarray): 2D distance matrix
         start_idx (int): Index of the starting place
         
     Returns:
         list: Ordered list of indices representing the route
     """
-    n = len(dist_matrix)
+    if COMPILED_KERNELS:
+        return greedy_solver_nb(_kernel_matrix(dist_matrix), start_idx).tolist()
+    
+    n = dist_matrix.shape[0]
     
     # Initialize variables
     current = start_idx
-    unvisited = set(range(n))
-    unvisited.remove(current)
-    route = [current]
+    visited = np.zeros(n, dtype=bool)
+    visited[current] = True
+    route = np.empty(n, dtype=np.intp)
+    route[0] = current
     
     # Greedily select nearest unvisited place until all places are visited
-    while unvisited:
-        # Find nearest unvisited place
-        nearest = min(unvisited, key=lambda i: dist_matrix[current][i])
+    for step in range(1, n):
+        # Find nearest unvisited place by masking visited ones out of the row
+        row = np.where(visited, np.inf, dist_matrix[current])
+        nearest = int(row.argmin())
         
         # Add to route and mark as visited
-        route.append(nearest)
-        unvisited.remove(nearest)
+        route[step] = nearest
+        visited[nearest] = True
         current = nearest
         
-    return route
+    return route.tolist()
 
 
 def optimize_route(route, dist_matrix):
     """
     Improve a route using the 2-opt algorithm.
     The 2-opt algorithm iteratively replaces two edges with two new ones
-    if it reduces the total distance.
+    if it reduces the total distance. Don't-look bits skip places whose
+    incoming edge found no improving swap, until a swap next to them changes
+    their neighbourhood; the search only stops after a pass over every edge
+    finds no improving swap, so the result is 2-opt optimal. The first and
+    last positions of the route stay fixed.
     
     Args:
         route (list): Initial route as a list of indices
-        dist_matrix (list): 2D distance matrix
+        dist_matrix (numpy.ndarray): 2D distance matrix
         
     Returns:
         list: Improved route
     """
-    # Make a copy of the route to avoid modifying the original
-    best_route = route.copy()
+    if COMPILED_KERNELS:
+        return two_opt_nb(np.array(route, dtype=np.int64), _kernel_matrix(dist_matrix)).tolist()
+    
+    # Work on an index array copy so reversals and distance lookups stay in NumPy
+    best_route = np.array(route, dtype=np.intp)
+    m = len(best_route)
+    dont_look = np.zeros(dist_matrix.shape[0], dtype=bool)
     improved = True
     
     while improved:
         improved = False
-        best_distance = calculate_route_distance(best_route, dist_matrix)
-        
-        # Try all possible combinations of edge swaps
-        for i in range(1, len(best_route) - 2):
-            for j in range(i + 1, len(best_route) - 1):
-                # Create new route with 2-opt swap
-                new_route = best_route.copy()
-                # Reverse the portion between i and j
-                new_route[i:j+1] = reversed(new_route[i:j+1])
+        skipped = False
+        
+        # Edge i joins route[i-1] and route[i]; try swapping it with every
+        # non-adjacent edge k unless route[i] is marked don't-look
+        for i in range(1, m):
+            if dont_look[best_route[i]]:
+                skipped = True
+                continue
+            
+            # x and y only depend on i, so their rows are looked up once here
+            x, y = best_route[i-1], best_route[i]
+            row_x, row_y = dist_matrix[x], dist_matrix[y]
+            d_xy = row_x.item(y)
+            found = False
+            
+            for k in range(1, m):
+                if abs(k - i) < 2:
+                    continue
                 
-                # Calculate new distance
-                new_distance = calculate_route_distance(new_route, dist_matrix)
+                # Reversing the stretch between the two edges replaces
+                # (x, y) and (u, v) with (x, u) and (y, v)
+                u, v = best_route[k-1], best_route[k]
+                # item() returns float64 Python floats; pairing the differences
+                # makes swaps that only relabel the same edges give exactly zero
+                delta = ((row_x.item(u) - d_xy)
+                         + (row_y.item(v) - dist_matrix.item(u, v)))
                 
-                # If the new route is better, keep it
-                if new_distance < best_distance:
-                    best_distance = new_distance
-                    best_route = new_route
-                    improved = True
-                    # We can break early once we find an improvement
+                # If the swap shortens the route, apply it in place
+                # (the tolerance ignores swaps that only differ by rounding)
+                if delta < -1e-12:
+                    lo, hi = min(i, k), max(i, k)
+                    best_route[lo:hi] = best_route[lo:hi][::-1]
+                    dont_look[[x, y, u, v]] = False
+                    found = improved = True
                     break
             
-            # If we found an improvement, break out of the outer loop as well
-            if improved:
-                break
+            # Nothing improved around this place; skip it until a neighbour changes
+            if not found:
+                dont_look[y] = True
+                
+        # A reversal flips which place each edge inside it belongs to, so a
+        # place can keep a don't-look bit for an edge it no longer has; before
+        # stopping, clear the bits and check every edge once more
+        if not improved and skipped:
+            dont_look[:] = False
+            improved = True
     
-    return best_route
+    return best_route.tolist()
 
 
 def calculate_route_distance(route, dist_matrix):
@@ -92,16 +187,16 @@ def calculate_route_distance(route, dist_matrix):
     Calculate the total distance of a route.
     
     Args:
-        route (list): List of indices representing the route
-        dist_matrix (list): 2D distance matrix
+        route (list or numpy.ndarray): List of indices representing the route
+        dist_matrix (numpy.ndarray): 2D distance matrix
         
     Returns:
         float: Total distance
     """
-    total = 0
-    for i in range(len(route) - 1):
-        total += dist_matrix[route[i]][route[i+1]]
-    return total
+    # No copy is made when the route is already an integer index array
+    route = np.asarray(route, dtype=np.intp)
+    # Accumulate in float64 so long routes do not lose float32 precision
+    return float(dist_matrix[route[:-1], route[1:]].sum(dtype=np.float64))
 
 
 def simulated_annealing(route, dist_matrix, temp_start=1000, temp_end=0.01, cooling_rate=0.995):
@@ -111,7 +206,7 @@ def simulated_annealing(route, dist_matrix, temp_start=1000, temp_end=0.01, cool
     
     Args:
         route (list): Initial route as a list of indices
-        dist_matrix (list): 2D distance matrix
+        dist_matrix (numpy.ndarray): 2D distance matrix
         temp_start (float): Starting temperature
         temp_end (float): Ending temperature
         cooling_rate (float): Rate at which temperature decreases
@@ -168,4 +263,65 @@ def simulated_annealing(route, dist_matrix, temp_start=1000, temp_end=0.01, cool
         # Cool down the temperature
         temperature *= cooling_rate
     
-    return best_route
\ No newline at end of file
+    return best_route
+
+
+def ortools_solver(dist_matrix, start_idx, return_to_start=False, time_limit=5):
+    """
+    Solve the TSP with the Google OR-tools routing solver.
+    A cheapest-arc first route is improved by guided local search for
+    ORTOOLS_MS_PER_PLACE milliseconds per place, capped at the time limit,
+    which for large inputs gets much closer to the optimum than greedy plus 2-opt.
+    
+    Args:
+        dist_matrix (numpy.ndarray): 2D distance matrix in kilometers
+        start_idx (int): Index of the starting place
+        return_to_start (bool): Whether the route ends back at the starting place
+        time_limit (float): Upper bound on the search time in seconds
+        
+    Returns:
+        list: Ordered list of indices representing the route, ending with
+        start_idx when return_to_start is set
+    """
+    if not ORTOOLS_AVAILABLE:
+        raise ImportError("ortools is not installed (pip install ortools)")
+    
+    n = dist_matrix.shape[0]
+    
+    # The routing solver works on integer costs, so use whole metres
+    costs = np.rint(np.asarray(dist_matrix, dtype=np.float64) * 1000).astype(np.int64)
+    
+    if return_to_start:
+        manager = pywrapcp.RoutingIndexManager(n, 1, start_idx)
+    else:
+        # An open route ends at a dummy place that is free to reach from anywhere
+        costs = np.pad(costs, ((0, 1), (0, 1)))
+        manager = pywrapcp.RoutingIndexManager(n + 1, 1, [start_idx], [n])
+    costs = costs.tolist()
+    
+    routing = pywrapcp.RoutingModel(manager)
+    transit = routing.RegisterTransitCallback(
+        lambda i, j: costs[manager.IndexToNode(i)][manager.IndexToNode(j)])
+    routing.SetArcCostEvaluatorOfAllVehicles(transit)
+    
+    params = pywrapcp.DefaultRoutingSearchParameters()
+    params.first_solution_strategy = routing_enums_pb2.FirstSolutionStrategy.PATH_CHEAPEST_ARC
+    params.local_search_metaheuristic = routing_enums_pb2.LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH
+    params.time_limit.FromMilliseconds(min(int(time_limit * 1000), ORTOOLS_MS_PER_PLACE * n))
+    
+    solution = routing.SolveWithParameters(params)
+    if solution is None:
+        # No route found in time; fall back to the greedy route
+        route = greedy_solver(dist_matrix, start_idx)
+        return route + [start_idx] if return_to_start else route
+    
+    # Walk the route from the start; the final node is the start or the dummy
+    route = []
+    index = routing.Start(0)
+    while not routing.IsEnd(index):
+        route.append(manager.IndexToNode(index))
+        index = solution.Value(routing.NextVar(index))
+    if return_to_start:
+        route.append(start_idx)
+        
+    return route
@@ -0,0 +1,266 @@
+"""
+Numba-compiled kernels for the TSP solver.
+The distance matrices, greedy nearest neighbor and 2-opt loops are
+written over plain NumPy arrays so Numba can compile them to machine code. When
+Numba is not installed the same functions run as ordinary Python and
+NUMBA_AVAILABLE is False.
+"""
+
+import numpy as np
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    prange = range
+    
+    def njit(*args, **kwargs):
+        """Stand-in for numba.njit that returns the function unchanged."""
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+# Fast-math flags without 'reassoc' and 'contract': both let LLVM round the
+# (i, j) and (j, i) distances differently, breaking the symmetry 2-opt relies on
+FASTMATH_FLAGS = {'nnan', 'ninf', 'nsz', 'arcp', 'afn'}
+
+# Number of places per block in greedy_solver_nb's visited bookkeeping
+VISIT_BLOCK = 64
+
+
+@njit(inline='always', fastmath=FASTMATH_FLAGS, cache=True)
+def _fast_sin(x):
+    """sin(x) for |x| <= pi from its Taylor series up to x**15."""
+    # Fold onto [0, pi/2] using sin(t) = sin(pi - t), then restore the sign;
+    # min and copysign keep this branch-free so the caller's loop vectorizes
+    t = min(abs(x), np.pi - abs(x))
+    z = t * t
+    return np.copysign(t * (1.0 + z * (-1.6666666666666666e-01 + z * (8.3333333333333333e-03
+        + z * (-1.9841269841269841e-04 + z * (2.7557319223985893e-06
+        + z * (-2.5052108385441720e-08 + z * (1.6059043836821613e-10
+        + z * -7.6471637318198164e-13))))))), x)
+
+
+@njit(inline='always', fastmath=FASTMATH_FLAGS, cache=True)
+def _fast_cos(x):
+    """cos(x) for |x| <= pi, using cos(x) = sin(pi/2 - |x|)."""
+    return _fast_sin(0.5 * np.pi - abs(x))
+
+
+@njit(inline='always', fastmath=FASTMATH_FLAGS, cache=True)
+def _fast_asin(x):
+    """asin(x) for 0 <= x <= 1 from the Cephes rational approximation."""
+    # The rational form holds up to 0.625; above 0.5 use
+    # asin(x) = pi/2 - 2 * asin(sqrt((1 - x) / 2)) instead of calling libm,
+    # leaving only selects and a sqrt that LLVM can vectorize
+    big = x > 0.5
+    x = np.sqrt(0.5 * (1.0 - x)) if big else x
+    z = x * x
+    p = (((((4.253011369004428248960e-03 * z - 6.019598008014123785661e-01) * z
+        + 5.444622390564711410273e+00) * z - 1.626247967210700244449e+01) * z
+        + 1.956261983317594739197e+01) * z - 8.198089802484824371615e+00)
+    q = (((((z - 1.474091372988853791896e+01) * z + 7.049610280856842141659e+01) * z
+        - 1.471791292232726029859e+02) * z + 1.395105614657485689735e+02) * z
+        - 4.918853881490881290097e+01)
+    r = x + x * z * p / q
+    return 0.5 * np.pi - 2.0 * r if big else r
+
+
+@njit(parallel=True, fastmath=FASTMATH_FLAGS, cache=True)
+def haversine_matrix_nb(lat, lon, radius):
+    """
+    Calculate the pairwise haversine distance matrix with rows split across threads.
+    Uses the polynomial sin/cos/asin approximations above (relative error around 1e-11).
+    
+    Args:
+        lat (numpy.ndarray): float64 latitudes in radians
+        lon (numpy.ndarray): float64 longitudes in radians, within [-pi, pi]
+        radius (float): Sphere radius; distances use the same unit
+        
+    Returns:
+        numpy.ndarray: 2D float32 distance matrix
+    """
+    n = lat.shape[0]
+    dist_matrix = np.empty((n, n), np.float32)
+    
+    # Per-place terms, computed once instead of once per pair
+    clat = np.empty(n, np.float64)
+    for k in range(n):
+        clat[k] = _fast_cos(lat[k])
+    half_lat = 0.5 * lat
+    half_lon = 0.5 * lon
+    
+    # Each thread fills whole rows, so no two threads write the same cache line.
+    # The inner loop is straight-line arithmetic, which LLVM vectorizes over j
+    for i in prange(n):
+        for j in range(n):
+            half_dlat = half_lat[j] - half_lat[i]
+            half_dlon = half_lon[j] - half_lon[i]
+            a = _fast_sin(half_dlat)**2 + clat[i] * clat[j] * _fast_sin(half_dlon)**2
+            dist_matrix[i, j] = 2 * radius * _fast_asin(np.sqrt(min(a, 1.0)))
+            
+    return dist_matrix
+
+
+@njit(parallel=True, fastmath=FASTMATH_FLAGS, cache=True)
+def equirectangular_matrix_nb(lat, lon, radius):
+    """
+    Calculate the pairwise equirectangular distance matrix with rows split across threads.
+    Each pair is treated as lying on a flat plane at their mean latitude.
+    
+    Args:
+        lat (numpy.ndarray): float64 latitudes in radians
+        lon (numpy.ndarray): float64 longitudes in radians, within [-pi, pi]
+        radius (float): Sphere radius; distances use the same unit
+        
+    Returns:
+        numpy.ndarray: 2D float32 distance matrix
+    """
+    n = lat.shape[0]
+    dist_matrix = np.empty((n, n), np.float32)
+    
+    # Per-place terms; the cosine of the mean latitude of a pair then follows
+    # from cos(a + b) = cos(a) cos(b) - sin(a) sin(b) without a per-pair cos
+    half_lat = 0.5 * lat
+    half_lon = 0.5 * lon
+    chalf = np.cos(half_lat)
+    shalf = np.sin(half_lat)
+    
+    for i in prange(n):
+        for j in range(n):
+            half_dlat = half_lat[j] - half_lat[i]
+            # Take the short way round across the antimeridian
+            half_dlon = abs(half_lon[j] - half_lon[i])
+            half_dlon = min(half_dlon, np.pi - half_dlon)
+            x = (chalf[i] * chalf[j] - shalf[i] * shalf[j]) * half_dlon
+            dist_matrix[i, j] = 2 * radius * np.sqrt(half_dlat * half_dlat + x * x)
+            
+    return dist_matrix
+
+
+@njit(cache=True)
+def greedy_solver_nb(dist_matrix, start_idx):
+    """
+    Greedy nearest neighbor route over a distance matrix.
+    Visited places are tracked in a boolean mask plus a count of unvisited
+    places per block of VISIT_BLOCK indices, so blocks that are fully visited
+    are skipped without scanning them.
+    
+    Args:
+        dist_matrix (numpy.ndarray): 2D float32 or float64 distance matrix
+        start_idx (int): Index of the starting place
+        
+    Returns:
+        numpy.ndarray: int64 array of place indices in visiting order
+    """
+    n = dist_matrix.shape[0]
+    visited = np.zeros(n, np.bool_)
+    route = np.empty(n, np.int64)
+    
+    n_blocks = (n + VISIT_BLOCK - 1) // VISIT_BLOCK
+    remaining = np.full(n_blocks, VISIT_BLOCK, np.int64)
+    remaining[-1] = n - (n_blocks - 1) * VISIT_BLOCK
+    
+    current = start_idx
+    visited[current] = True
+    remaining[current // VISIT_BLOCK] -= 1
+    route[0] = current
+    
+    for step in range(1, n):
+        # Scan the current row for the nearest unvisited place
+        nearest = -1
+        nearest_dist = np.inf
+        for block in range(n_blocks):
+            if remaining[block] == 0:
+                continue
+            for k in range(block * VISIT_BLOCK, min(n, (block + 1) * VISIT_BLOCK)):
+                if not visited[k] and dist_matrix[current, k] < nearest_dist:
+                    nearest = k
+                    nearest_dist = dist_matrix[current, k]
+                    
+        route[step] = nearest
+        visited[nearest] = True
+        remaining[nearest // VISIT_BLOCK] -= 1
+        current = nearest
+        
+    return route
+
+
+@njit(cache=True)
+def two_opt_nb(route, dist_matrix):
+    """
+    Improve a route in place using 2-opt with O(1) edge delta evaluation and
+    don't-look bits. The first and last positions of the route are kept fixed.
+    The whole search runs to convergence inside this one compiled call.
+    
+    Args:
+        route (numpy.ndarray): int64 array of place indices, modified in place
+        dist_matrix (numpy.ndarray): 2D float32 or float64 distance matrix
+        
+    Returns:
+        numpy.ndarray: The improved route (same array as the input)
+    """
+    m = route.shape[0]
+    dont_look = np.zeros(dist_matrix.shape[0], np.bool_)
+    improved = True
+    
+    while improved:
+        improved = False
+        skipped = False
+        
+        for i in range(1, m):
+            if dont_look[route[i]]:
+                skipped = True
+                continue
+            
+            # Rows of x and y are invariant over k, so take them once per i
+            x = route[i-1]
+            y = route[i]
+            row_x = dist_matrix[x]
+            row_y = dist_matrix[y]
+            d_xy = np.float64(row_x[y])
+            found = False
+            
+            # Edge (u, v) slides along the route, so each step loads one place
+            v = route[0]
+            for k in range(1, m):
+                u = v
+                v = route[k]
+                if abs(k - i) < 2:
+                    continue
+                
+                # Differences are taken in float64 and paired so that swaps
+                # which only relabel the same edges give exactly zero
+                delta = ((np.float64(row_x[u]) - d_xy)
+                         + (np.float64(row_y[v]) - np.float64(dist_matrix[u, v])))
+                
+                if delta < -1e-12:
+                    # Reverse the stretch between the two edges in place
+                    lo = min(i, k)
+                    hi = max(i, k) - 1
+                    while lo < hi:
+                        tmp = route[lo]
+                        route[lo] = route[hi]
+                        route[hi] = tmp
+                        lo += 1
+                        hi -= 1
+                    dont_look[x] = False
+                    dont_look[y] = False
+                    dont_look[u] = False
+                    dont_look[v] = False
+                    found = True
+                    improved = True
+                    break
+                    
+            if not found:
+                dont_look[y] = True
+                
+        # A reversal flips which place each edge inside it belongs to, so a
+        # place can keep a don't-look bit for an edge it no longer has; before
+        # stopping, clear the bits and check every edge once more
+        if not improved and skipped:
+            dont_look[:] = False
+            improved = True
+            
+    return route